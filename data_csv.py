@@ -4,42 +4,76 @@ Summer 2021
 Project Name: Demand 2050
 File: data_csv.py (main)
 Description: Retrieve source data from csv file.
+
+The csv file is read the first time one of the module level names
+(sources, coal, natural_gas, ...) is used. load_sources() returns a
+fresh parse without touching those names, e.g. to time it inside
+instrumentation.profile(); reload() reads the file again and
+reassigns them.
 """
 
 import csv
 
-sources = []
-with open('source_data.csv', 'r', encoding="utf-8-sig") as csv_file:
-    csv_reader = csv.DictReader(csv_file)
-
-    for line in csv_reader:
-        # print(line, end='\n\n')
-        for key in line.copy():
-            # print(key,end=', ')
-            if line.get(key) == '': # delete empty entities
-                del line[key]
-            elif line.get(key).isnumeric():  # Convert to int
-                line[key] = int(line[key])
-            elif line.get(key).replace('.', '', 1).isdigit(): # Convert to float
-                line[key] = float(line[key])
-       
-        sources.append(line)
-
-for source in sources:
-    try:
-        name = source['name'].lower()
-        if  name == 'coal':
-            coal = source
-        elif name == 'natural gas':
-            natural_gas = source
-        elif name == 'advanced nuclear':
-            advanced_nuclear = source
-        elif name == 'onshore wind':
-            onshore_wind = source
-        elif name == 'rooftop solar pv':
-            rooftop_solar = source
-        else:
-            raise ValueError(f"Unknown source error: '{name}' "
-                "does not match database.")
-    except ValueError as err:
-        print(err)
\ No newline at end of file
+import instrumentation
+
+SOURCE_NAMES = {
+    'coal': 'coal',
+    'natural gas': 'natural_gas',
+    'advanced nuclear': 'advanced_nuclear',
+    'onshore wind': 'onshore_wind',
+    'rooftop solar pv': 'rooftop_solar'
+}
+
+def load_sources(path='source_data.csv'):
+    """Read sources from a csv file, converting numeric entries."""
+    sources = []
+    with instrumentation.timer('data_csv.load') as counter, \
+            open(path, 'r', encoding="utf-8-sig") as csv_file:
+        csv_reader = csv.DictReader(csv_file)
+
+        for line in csv_reader:
+            for key in line.copy():
+                if line.get(key) == '': # delete empty entities
+                    del line[key]
+                elif line.get(key).isnumeric():  # Convert to int
+                    line[key] = int(line[key])
+                # Convert to float
+                elif line.get(key).replace('.', '', 1).isdigit():
+                    line[key] = float(line[key])
+
+            sources.append(line)
+            counter['rows'] += 1
+    return sources
+
+def sort_sources(sources):
+    """Map each source to its module level name."""
+    named = {}
+    for source in sources:
+        try:
+            name = source['name'].lower()
+            if name not in SOURCE_NAMES:
+                raise ValueError(f"Unknown source error: '{name}' "
+                    "does not match database.")
+            named[SOURCE_NAMES[name]] = source
+        except ValueError as err:
+            print(err)
+    return named
+
+def reload(path='source_data.csv'):
+    """Read the csv file again and reassign the module level names."""
+    for name in SOURCE_NAMES.values():
+        globals().pop(name, None)
+    sources = load_sources(path)
+    globals()['sources'] = sources
+    globals().update(sort_sources(sources))
+    return sources
+
+def __getattr__(attr):
+    """Load the csv file on first use of a module level name."""
+    if ((attr == 'sources' or attr in SOURCE_NAMES.values())
+        and 'sources' not in globals()):
+        reload()
+    if attr not in globals():
+        raise AttributeError(f"module '{__name__}' has no "
+            f"attribute '{attr}'")
+    return globals()[attr]
@@ -10,6 +10,8 @@ Description: Store class to handle energy source properties
 import sys
 import matplotlib.pyplot as plt
 
+import instrumentation
+
 class EnergySource:
     """
     Derive properties of energy sources from given properties.
@@ -51,6 +53,7 @@ class EnergySource:
     # Power conversions
     KW_PER_W = 1e-3
 
+    @instrumentation.instrument()
     def __init__(self, *, name='No Name', capacity=None, 
         capacity_factor=None, capital_cost=None, f_o_and_m=None,
         v_o_and_m=None, fuel_cost=None, heat_rate=None, 
@@ -116,6 +119,7 @@ class EnergySource:
             print(err)
             sys.exit()
 
+    @instrumentation.instrument()
     def calc_CRF(self):
         """Calculate the CRF based on interest and annuity."""
         self.CRF = ((self.i * (1 + self.i)**self.n) 
@@ -129,6 +133,7 @@ class EnergySource:
             self.efficiency = (EnergySource.BTU_PER_KWH 
                 / self.heat_rate)
 
+    @instrumentation.instrument()
     def calc_LCOE(self):
         """
         Calculate LCOE based on variety of costs.
@@ -205,6 +210,7 @@ class EnergySource:
             + self.subsidy_term)
         self.LCOE = self.LCOE_kWh * EnergySource.KWH_PER_MWH
 
+    @instrumentation.instrument()
     def print_all(self):
         """Print all print methods for a source."""
         self.print_info()
@@ -213,6 +219,7 @@ class EnergySource:
         self.print_fuel_info()
         self.print_efficiency_info()
 
+    @instrumentation.instrument()
     def print_cost_distribution_info(self, *, graph=False):
         """Present different costs of a source. Graph as option."""
         print('-' * 70)
@@ -249,6 +256,7 @@ class EnergySource:
             plt.axis('equal')
             plt.show()
 
+    @instrumentation.instrument()
     def print_efficiency_info(self):
         """Print efficiency properties of source."""
         print('-' * 70)
@@ -261,6 +269,7 @@ class EnergySource:
                 f"{round(self.efficiency * 100, 2)}%")
         print('-' * 70)
 
+    @instrumentation.instrument()
     def print_fuel_info(self):
         """Print fuel properties of source."""
         print('-' * 70)
@@ -276,6 +285,7 @@ class EnergySource:
             print("This source doesn't have fuel information.")
         print('-' * 70)
 
+    @instrumentation.instrument()
     def print_info(self):
         """Print general information of source."""
         print('-' * 70)
@@ -292,6 +302,7 @@ class EnergySource:
         print(f"Levelized Cost ${round(self.LCOE, 2)}/MWh")
         print('-' * 70)
 
+    @instrumentation.instrument()
     def print_input_properties(self):
         """Print all input properties."""
         print('-' * 70)
@@ -346,6 +357,7 @@ class EnergySource:
             print(f"Subsidy: ${self.subsidy}/kWh")
         print('-' * 70)
 
+    @instrumentation.instrument()
     def print_power_info(self):
         """Print power properties of source."""
         print('-' * 70)
@@ -362,6 +374,7 @@ class EnergySource:
         print('-' * 70)
 
     @classmethod
+    @instrumentation.instrument()
     def print_all_instances(cls):
         """Print all instances of EnergySource class."""
         print('-' * 70)
@@ -371,6 +384,7 @@ class EnergySource:
         print('-' * 70)
 
     @classmethod
+    @instrumentation.instrument()
     def print_LCOE_comparison(cls):
         """Print LCOEs for all instances in order."""
         print('-' * 70)
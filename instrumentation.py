@@ -0,0 +1,239 @@
+"""
+Author: Lucas Hudson
+Summer 2021
+Project Name: Demand 2050
+File: instrumentation.py (module)
+Description: Opt-in call counts, timing, throughput and memory
+tracking for the hot paths of the comparer.
+"""
+
+import cProfile
+import functools
+import http.server
+import json
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+enabled = False
+registry = {}
+_lock = threading.Lock()
+# True while profile() owns tracemalloc and may reset its peak
+_memory_session = False
+# Per-thread stack of [start, inner peak] traced memory of each call
+# being measured
+_local = threading.local()
+
+
+def enable():
+    """Turn on recording for instrumented functions."""
+    global enabled
+    enabled = True
+
+
+def disable():
+    """Turn off recording for instrumented functions."""
+    global enabled
+    enabled = False
+
+
+def reset():
+    """Clear everything recorded so far."""
+    with _lock:
+        registry.clear()
+
+
+def record(name, elapsed, *, rows=None, peak_memory=0):
+    """
+    Add one call of 'name' taking 'elapsed' seconds.
+
+    'rows' is only given by blocks that count the rows they process;
+    'peak_memory' is the traced memory (bytes) the call allocated
+    above its starting level at its peak. It is only measured inside
+    profile(), and since tracemalloc is process-wide, allocations made
+    by other threads at the same time are included.
+    """
+    with _lock:
+        stats = registry.setdefault(name, {'calls': 0,
+            'total_time': 0.0, 'peak_memory': 0})
+        stats['calls'] += 1
+        stats['total_time'] += elapsed
+        stats['peak_memory'] = max(stats['peak_memory'], peak_memory)
+        if rows is not None:
+            stats['rows'] = stats.get('rows', 0) + rows
+
+
+def _memory_stack():
+    """Return the memory stack of the current thread."""
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+
+def _memory_enter():
+    """Start measuring the traced peak for a call, if profiling."""
+    if not _memory_session:
+        return False
+    stack = _memory_stack()
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        # Keep the enclosing call's peak before resetting it.
+        stack[-1][1] = max(stack[-1][1], peak)
+    stack.append([current, 0])
+    tracemalloc.reset_peak()
+    return True
+
+
+def _memory_exit():
+    """Return (start, peak) traced memory of the call just finished."""
+    stack = _memory_stack()
+    peak = tracemalloc.get_traced_memory()[1]
+    start, inner_peak = stack.pop()
+    peak = max(peak, inner_peak)
+    if stack:
+        stack[-1][1] = max(stack[-1][1], peak)
+    return start, peak
+
+
+def instrument(name=None):
+    """Decorate a function so its calls are recorded when enabled."""
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            tracing = _memory_enter()
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                peak_memory = 0
+                if tracing:
+                    memory_start, memory_peak = _memory_exit()
+                    peak_memory = memory_peak - memory_start
+                record(label, elapsed, peak_memory=peak_memory)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def timer(name):
+    """
+    Record a block of code as one call of 'name'.
+
+    Yields a dict whose 'rows' entry the block can increase to report
+    how many rows it processed.
+    """
+    counter = {'rows': 0}
+    if not enabled:
+        yield counter
+        return
+    tracing = _memory_enter()
+    start = time.perf_counter()
+    try:
+        yield counter
+    finally:
+        elapsed = time.perf_counter() - start
+        peak_memory = 0
+        if tracing:
+            memory_start, memory_peak = _memory_exit()
+            peak_memory = memory_peak - memory_start
+        record(name, elapsed, rows=counter['rows'],
+            peak_memory=peak_memory)
+
+
+def snapshot():
+    """Return a copy of the registry with derived rates added."""
+    with _lock:
+        metrics = {name: dict(stats) for name, stats in registry.items()}
+    for stats in metrics.values():
+        if 'rows' not in stats:
+            continue
+        if stats['total_time'] > 0:
+            stats['rows_per_second'] = stats['rows'] / stats['total_time']
+        else:
+            stats['rows_per_second'] = 0.0
+    return metrics
+
+
+def dump_json(path=None):
+    """Return the metrics as JSON, also writing them to 'path' if given."""
+    text = json.dumps(snapshot(), indent=2, sort_keys=True)
+    if path is not None:
+        with open(path, 'w', encoding="utf-8") as json_file:
+            json_file.write(text)
+    return text
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """Answer every GET with the current metrics as JSON."""
+
+    def do_GET(self):
+        body = dump_json().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port=8000, host='127.0.0.1'):
+    """Serve the metrics on a local port from a background thread."""
+    server = http.server.HTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@contextmanager
+def profile(*, sort='cumulative', limit=20, stream=None):
+    """
+    Run a block under cProfile and tracemalloc with recording enabled.
+
+    On exit the top 'limit' functions sorted by 'sort' and the peak
+    traced memory are printed to 'stream' (stdout by default).
+    Per-call peak memory is only measured when profile() starts
+    tracemalloc itself, so a caller's own tracing is left untouched.
+    """
+    global _memory_session
+    stream = stream or sys.stdout
+    was_enabled = enabled
+    owns_tracing = False
+    measuring = False
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        enable()
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            owns_tracing = True
+            _memory_session = True
+        measuring = _memory_enter()
+        yield profiler
+    finally:
+        profiler.disable()
+        if measuring:
+            peak = _memory_exit()[1]
+        else:
+            peak = tracemalloc.get_traced_memory()[1]
+        if owns_tracing:
+            _memory_session = False
+            tracemalloc.stop()
+        if not was_enabled:
+            disable()
+        print('-' * 70, file=stream)
+        print("Profile results:", file=stream)
+        pstats.Stats(profiler, stream=stream).sort_stats(sort) \
+            .print_stats(limit)
+        print(f"Peak traced memory: {round(peak / 1024, 2)} KiB",
+            file=stream)
+        print('-' * 70, file=stream)
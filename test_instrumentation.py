@@ -0,0 +1,244 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import tracemalloc
+import unittest
+import urllib.request
+from unittest import mock
+
+import data_csv
+import instrumentation
+from energy_source import EnergySource
+
+@instrumentation.instrument('square')
+def square(x):
+    return x * x
+
+@instrumentation.instrument('allocate')
+def allocate(size):
+    return len(bytearray(size))
+
+@instrumentation.instrument('outer')
+def outer():
+    allocate(1_000_000)
+    return len(bytearray(1000))
+
+class TestInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        instrumentation.reset()
+        instrumentation.enable()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled_records_nothing(self):
+        instrumentation.disable()
+        self.assertEqual(square(3), 9)
+        with instrumentation.timer('block') as counter:
+            counter['rows'] += 5
+        self.assertEqual(instrumentation.snapshot(), {})
+
+    def test_instrument_counts_calls(self):
+        for x in range(4):
+            square(x)
+        stats = instrumentation.snapshot()['square']
+        self.assertEqual(stats['calls'], 4)
+        self.assertGreaterEqual(stats['total_time'], 0)
+        self.assertNotIn('rows', stats)
+        self.assertNotIn('rows_per_second', stats)
+
+    def test_timer_counts_rows(self):
+        with instrumentation.timer('block') as counter:
+            counter['rows'] += 10
+        stats = instrumentation.snapshot()['block']
+        self.assertEqual(stats['calls'], 1)
+        self.assertEqual(stats['rows'], 10)
+        self.assertIn('rows_per_second', stats)
+
+    def test_dump_json(self):
+        square(2)
+        metrics = json.loads(instrumentation.dump_json())
+        self.assertEqual(metrics['square']['calls'], 1)
+
+    def test_profile(self):
+        instrumentation.disable()
+        stream = io.StringIO()
+        with instrumentation.profile(stream=stream):
+            square(5)
+        self.assertFalse(instrumentation.enabled)
+        self.assertEqual(instrumentation.snapshot()['square']['calls'], 1)
+        self.assertIn("Peak traced memory", stream.getvalue())
+
+    def test_peak_memory_per_call(self):
+        stream = io.StringIO()
+        with instrumentation.profile(stream=stream):
+            outer()
+            square(5)
+        metrics = instrumentation.snapshot()
+        self.assertGreaterEqual(metrics['allocate']['peak_memory'],
+            1_000_000)
+        # The nested allocation counts towards the enclosing call...
+        self.assertGreaterEqual(metrics['outer']['peak_memory'],
+            1_000_000)
+        # ...but not towards a later call that allocates nothing.
+        self.assertLess(metrics['square']['peak_memory'], 1_000_000)
+        self.assertIn("Peak traced memory", stream.getvalue())
+
+    def test_caller_peak_survives(self):
+        tracemalloc.start()
+        try:
+            len(bytearray(5_000_000))
+            square(5)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertGreaterEqual(peak, 5_000_000)
+
+    def test_profile_setup_failure(self):
+        instrumentation.disable()
+        with mock.patch.object(instrumentation.cProfile.Profile,
+            'enable', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                with instrumentation.profile(stream=io.StringIO()):
+                    pass
+        self.assertFalse(instrumentation.enabled)
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(instrumentation._memory_stack(), [])
+
+    def test_memory_stack_per_thread(self):
+        depths = []
+        def work():
+            allocate(10_000)
+            depths.append(len(instrumentation._memory_stack()))
+        with instrumentation.profile(stream=io.StringIO()):
+            threads = [threading.Thread(target=work) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(instrumentation._memory_stack()), 1)
+        self.assertEqual(depths, [0] * 4)
+        self.assertEqual(instrumentation.snapshot()['allocate']['calls'], 4)
+
+    def test_serve_metrics(self):
+        square(2)
+        server = instrumentation.serve_metrics(port=0)
+        try:
+            url = f"http://127.0.0.1:{server.server_port}/"
+            with urllib.request.urlopen(url) as response:
+                metrics = json.loads(response.read())
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertEqual(metrics['square']['calls'], 1)
+
+class TestEnergySourceInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        instrumentation.reset()
+        instrumentation.enable()
+        self.instances = list(EnergySource.instances)
+        self.source1 = {
+            'name': 'Coal',
+            'capital_cost': 3636,
+            'f_o_and_m': 42.1,
+            'v_o_and_m': 4.6,
+            'fuel_cost': 1.95,
+            'heat_rate': 10000,
+            'capacity': 650,
+            'capacity_factor': 0.475
+        }
+        self.source2 = {
+            'name': 'Natural Gas',
+            'capital_cost': 978,
+            'f_o_and_m': 11,
+            'v_o_and_m': 3.5,
+            'fuel_cost': 3.95,
+            'heat_rate': 6600,
+            'capacity': 702,
+            'capacity_factor': 0.568
+        }
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+        EnergySource.instances[:] = self.instances
+
+    def test_construction(self):
+        EnergySource(**self.source1)
+        EnergySource(**self.source2)
+        metrics = instrumentation.snapshot()
+        for name in ['__init__', 'calc_CRF', 'calc_LCOE']:
+            stats = metrics[f"energy_source.EnergySource.{name}"]
+            self.assertEqual(stats['calls'], 2)
+            self.assertNotIn('rows_per_second', stats)
+
+    def test_comparison(self):
+        EnergySource(**self.source1)
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            EnergySource.print_LCOE_comparison()
+        self.assertIn("Coal", output.getvalue())
+        stats = instrumentation.snapshot()[
+            "energy_source.EnergySource.print_LCOE_comparison"]
+        self.assertEqual(stats['calls'], 1)
+
+    def test_report(self):
+        plant = EnergySource(**self.source2)
+        with contextlib.redirect_stdout(io.StringIO()):
+            plant.print_all()
+        metrics = instrumentation.snapshot()
+        self.assertEqual(
+            metrics["energy_source.EnergySource.print_all"]['calls'], 1)
+        self.assertEqual(
+            metrics["energy_source.EnergySource.print_info"]['calls'], 1)
+
+class TestDataCsvInstrumentation(unittest.TestCase):
+
+    def setUp(self):
+        instrumentation.reset()
+        instrumentation.enable()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_load_sources(self):
+        sources = data_csv.load_sources()
+        self.assertEqual(len(sources), 5)
+        stats = instrumentation.snapshot()['data_csv.load']
+        self.assertEqual(stats['calls'], 1)
+        self.assertEqual(stats['rows'], 5)
+        self.assertIn('rows_per_second', stats)
+
+    def test_module_names(self):
+        self.assertEqual(data_csv.coal['name'], 'Coal')
+        self.assertEqual(len(data_csv.sources), 5)
+
+    def test_reload(self):
+        data_csv.coal['capacity'] = 0
+        data_csv.reload()
+        self.assertEqual(data_csv.coal['capacity'], 650)
+        self.assertEqual(
+            instrumentation.snapshot()['data_csv.load']['calls'], 1)
+
+    def test_missing_source_loads_once(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv',
+            delete=False) as csv_file:
+            csv_file.write("name,capacity\nOnshore Wind,100\n")
+        try:
+            data_csv.reload(csv_file.name)
+            instrumentation.reset()
+            for _ in range(3):
+                self.assertFalse(hasattr(data_csv, 'coal'))
+            self.assertEqual(instrumentation.snapshot(), {})
+        finally:
+            os.remove(csv_file.name)
+            data_csv.reload()
+
+if __name__ == '__main__':
+    unittest.main()